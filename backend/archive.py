@@ -0,0 +1,105 @@
+"""Moves finished bookings from ``bookings`` into ``bookings_history``.
+
+The overlap check, calendars and "my bookings" only need current and
+future bookings, so ``bookings`` is kept small by archiving anything that
+ended before the cutoff or is no longer active. Analytics read both tables
+through ``all_bookings()``.
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import case, delete, insert, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from config import settings
+from database import AsyncSessionLocal
+from occupancy import occupancy_cache
+
+COLUMNS = ("id", "user_id", "car_id", "start_date", "end_date", "status")
+
+
+def all_bookings():
+    """Hot and archived bookings as one selectable with the same columns."""
+    hot = select(*(getattr(models.Booking, column) for column in COLUMNS))
+    history = select(*(getattr(models.BookingHistory, column) for column in COLUMNS))
+    return union_all(hot, history).subquery("all_bookings")
+
+
+def archivable(cutoff: datetime):
+    return or_(
+        models.Booking.end_date < cutoff,
+        models.Booking.status != "active",
+    )
+
+
+async def move_to_history(db: AsyncSession, condition) -> list[int]:
+    """Move bookings matching ``condition`` in the caller's transaction.
+
+    Active bookings become completed if they have ended and cancelled if
+    not. Returns the ids moved.
+    """
+    result = await db.execute(select(models.Booking.id).where(condition))
+    ids = result.scalars().all()
+    if not ids:
+        return ids
+
+    now = datetime.now(UTC)
+    rows = select(
+        models.Booking.id,
+        models.Booking.user_id,
+        models.Booking.car_id,
+        models.Booking.start_date,
+        models.Booking.end_date,
+        case(
+            (
+                (models.Booking.status == "active") & (models.Booking.end_date < now),
+                "completed",
+            ),
+            (models.Booking.status == "active", "cancelled"),
+            else_=models.Booking.status,
+        ),
+        literal(now, models.BookingHistory.archived_at.type),
+    ).where(models.Booking.id.in_(ids))
+    await db.execute(
+        insert(models.BookingHistory).from_select([*COLUMNS, "archived_at"], rows)
+    )
+    await db.execute(delete(models.Booking).where(models.Booking.id.in_(ids)))
+    return ids
+
+
+async def archive_bookings(
+    cutoff: datetime | None = None,
+    batch_size: int = settings.booking_archive_batch_size,
+    pause: float = 0.05,
+) -> int:
+    """Archive in batches of ``batch_size``, one short transaction each.
+
+    Returns the number of rows moved.
+    """
+    if cutoff is None:
+        cutoff = datetime.now(UTC) - timedelta(days=settings.booking_archive_after_days)
+
+    archived = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            batch = (
+                select(models.Booking.id)
+                .where(archivable(cutoff))
+                .order_by(models.Booking.id)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            ids = await move_to_history(db, models.Booking.id.in_(batch))
+            if not ids:
+                break
+            await db.commit()
+
+        archived += len(ids)
+        # Let request transactions in between batches
+        await asyncio.sleep(pause)
+
+    if archived:
+        await occupancy_cache.invalidate()
+    return archived
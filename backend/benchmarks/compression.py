@@ -0,0 +1,84 @@
+"""Bytes saved and CPU spent compressing large ``list_cars`` responses.
+
+    uv run benchmarks/compression.py --cars 1000 5000 20000
+
+Builds ``GET /api/cars`` bodies the way FastAPI serializes them and runs
+each through the compressors ``CompressionMiddleware`` uses. Brotli and
+zstd rows only appear when those packages are installed.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compression import (  # noqa: E402
+    BrotliCompressor,
+    GzipCompressor,
+    ZstdCompressor,
+    brotli,
+    zstandard,
+)
+from schemas import CarResponse  # noqa: E402
+
+
+def catalog_body(cars: int) -> bytes:
+    rng = random.Random(0)
+    rows = []
+    for i in range(1, cars + 1):
+        image_file = f"{rng.getrandbits(128):032x}.jpg"
+        car = CarResponse(
+            id=i,
+            owner_id=rng.randint(1, cars // 5 + 1),
+            brand=rng.choice(["Toyota", "Honda", "Hyundai", "Tata", "Mahindra"]),
+            model=f"Model {rng.randint(1, 500)}",
+            year=rng.randint(2005, 2025),
+            price_per_day=float(rng.randint(1000, 10000)),
+            location=rng.choice(["Kochi", "Chennai", "Bengaluru", "Mumbai"]),
+            contact_number=f"9{rng.randint(0, 999_999_999):09d}",
+            image_file=image_file,
+            status="available",
+            image_path=f"/media/car_images/{image_file}",
+        )
+        rows.append(car.model_dump_json().encode())
+    return b"[" + b",".join(rows) + b"]"
+
+
+def codecs():
+    yield "gzip-1", lambda: GzipCompressor(level=1)
+    yield "gzip-6", lambda: GzipCompressor(level=6)
+    if brotli is not None:
+        yield "br-1", lambda: BrotliCompressor(quality=1)
+        yield "br-4", lambda: BrotliCompressor(quality=4)
+    if zstandard is not None:
+        yield "zstd-1", lambda: ZstdCompressor(level=1)
+        yield "zstd-3", lambda: ZstdCompressor(level=3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cars", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'cars':>6} {'codec':<8}{'bytes':>11}{'ratio':>8}{'ms/resp':>9}{'MB/s':>8}")
+    for cars in args.cars:
+        body = catalog_body(cars)
+        print(f"{cars:>6} {'identity':<8}{len(body):>11}{1:>8.1%}")
+        for name, make in codecs():
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                compressed = make().finish(body)
+            elapsed = (time.perf_counter() - started) / args.repeat
+            print(
+                f"{'':>6} {name:<8}{len(compressed):>11}"
+                f"{len(compressed) / len(body):>8.1%}"
+                f"{elapsed * 1000:>9.2f}{len(body) / elapsed / 1e6:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
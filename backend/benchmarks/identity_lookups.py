@@ -0,0 +1,133 @@
+"""Compare signup and login lookups with and without the lower() indexes.
+
+    uv run benchmarks/identity_lookups.py --users 1000000
+
+Builds a scratch SQLite database from the models, fills ``users``, then
+times the queries the users router issues:
+
+* login: ``lower(email) = ?``
+* signup before: ``lower(username) = ?`` and ``lower(email) = ?`` pre-checks
+  followed by the insert
+* signup now: the insert alone, relying on the unique indexes
+
+once without the expression indexes (the old schema) and once with them.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import models  # noqa: E402
+from database import Base  # noqa: E402
+
+LOWER_INDEXES = {
+    "ix_users_username_lower": "lower(username)",
+    "ix_users_email_lower": "lower(email)",
+}
+
+
+def fill(conn, users: int, chunk_size: int = 50_000) -> None:
+    for start in range(0, users, chunk_size):
+        conn.execute(
+            insert(models.User),
+            [
+                {
+                    "username": f"User{i}",
+                    "email": f"user{i}@example.com",
+                    "password_hash": "x",
+                }
+                for i in range(start, min(start + chunk_size, users))
+            ],
+        )
+
+
+def timed(label: str, operations: int, run) -> None:
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {label:<28}{elapsed / operations * 1e6:>12.1f} us/op"
+        f"{operations / elapsed:>12.0f} ops/s"
+    )
+
+
+def run_suite(conn, users: int, samples: int) -> None:
+    rng = random.Random(1)
+    emails = [f"USER{rng.randrange(users)}@example.com" for _ in range(samples)]
+
+    def login():
+        for email in emails:
+            conn.execute(
+                select(models.User).where(
+                    func.lower(models.User.email) == email.lower()
+                )
+            ).first()
+
+    def signup(pre_check: bool, first_id: int):
+        for i in range(first_id, first_id + samples):
+            username, email = f"New{i}", f"new{i}@example.com"
+            if pre_check:
+                conn.execute(
+                    select(models.User).where(
+                        func.lower(models.User.username) == username.lower()
+                    )
+                ).first()
+                conn.execute(
+                    select(models.User).where(
+                        func.lower(models.User.email) == email.lower()
+                    )
+                ).first()
+            conn.execute(
+                insert(models.User).values(
+                    username=username, email=email, password_hash="x"
+                )
+            )
+
+    timed("login lookup", samples, login)
+    timed("signup with pre-checks", samples, lambda: signup(True, 0))
+    timed("signup, insert only", samples, lambda: signup(False, samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp(prefix="bench-")) / "identity.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[models.User.__table__])
+
+    with engine.begin() as conn:
+        for name in LOWER_INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+        started = time.perf_counter()
+        fill(conn, args.users)
+        print(f"inserted {args.users} users in {time.perf_counter() - started:.1f}s")
+
+    # Suites run on connections that are never committed, so both start from
+    # the same table
+    with engine.connect() as conn:
+        print("without lower() indexes")
+        run_suite(conn, args.users, args.samples)
+
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        for name, expression in LOWER_INDEXES.items():
+            conn.execute(text(f"CREATE UNIQUE INDEX {name} ON users ({expression})"))
+        print(f"built lower() indexes in {time.perf_counter() - started:.1f}s")
+
+    with engine.connect() as conn:
+        print("with lower() indexes")
+        run_suite(conn, args.users, args.samples)
+
+
+if __name__ == "__main__":
+    main()
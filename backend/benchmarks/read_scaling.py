@@ -0,0 +1,139 @@
+"""Measure read throughput of ``GET /api/cars`` as workers are added.
+
+    uv run benchmarks/read_scaling.py --workers 1 2 4 8
+
+Starts ``serve.py`` with each worker count against a scratch database,
+drives it from several client processes over keep-alive connections and
+prints requests per second and scaling efficiency relative to one worker.
+Load generators share the machine with the server, so give it at least
+twice as many cores as the largest worker count for meaningful numbers.
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def wait_until_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/cars").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def seed(port: int, cars: int) -> None:
+    base = f"http://127.0.0.1:{port}/api"
+    credentials = {"username": "bench", "email": "bench@example.com"}
+    httpx.post(f"{base}/users", json={**credentials, "password": "benchmark"})
+    token = httpx.post(
+        f"{base}/users/token",
+        data={"username": credentials["email"], "password": "benchmark"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(cars):
+        httpx.post(
+            f"{base}/cars",
+            headers=headers,
+            data={
+                "brand": "Brand",
+                "model": f"Model {i}",
+                "year": 2020,
+                "price_per_day": 100 + i,
+                "location": "Kochi",
+                "contact_number": "9999999999",
+            },
+            files={"image": ("car.jpg", b"\xff\xd8\xff", "image/jpeg")},
+        )
+
+
+def client(port: int, duration: float, counter) -> None:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    done = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        connection.request("GET", "/api/cars")
+        response = connection.getresponse()
+        response.read()
+        done += 1
+    with counter.get_lock():
+        counter.value += done
+
+
+def measure(port: int, clients: int, duration: float) -> float:
+    counter = multiprocessing.Value("i", 0)
+    processes = [
+        multiprocessing.Process(target=client, args=(port, duration, counter))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return counter.value / duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients-per-worker", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--cars", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    (workdir / "templates").symlink_to(BACKEND_DIR / "templates")
+    (workdir / "media" / "car_images").mkdir(parents=True)
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    env.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+
+    baseline = None
+    seeded = False
+    print(f"{'workers':>8} {'req/s':>10} {'efficiency':>11}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                str(BACKEND_DIR / "serve.py"),
+                "--workers",
+                str(workers),
+                "--port",
+                str(args.port),
+            ],
+            cwd=workdir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(args.port)
+            if not seeded:
+                seed(args.port, args.cars)
+                seeded = True
+            measure(args.port, workers, 1.0)  # warm up every worker's cache
+            rate = measure(args.port, workers * args.clients_per_worker, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or rate
+        efficiency = rate / (baseline * workers)
+        print(f"{workers:>8} {rate:>10.0f} {efficiency:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Booking and car creation throughput of the endpoints under concurrency.
+
+    uv run benchmarks/write_throughput.py --clients 1 16 64 --synchronous FULL
+
+Calls the ``create_booking`` and ``create_car`` handlers the way a request
+does: with a session that has already loaded the current user, as
+``CurrentUser`` leaves it, and with the app's engine, pool and group
+committer against a scratch database. Each is compared with the
+transaction-per-request version it replaced (commit, refresh and, for
+bookings, a second commit, then a commit of its own for the cache
+invalidation). The app runs with ``synchronous=NORMAL``, where
+WAL commits don't fsync; ``FULL`` shows what each saved commit is worth on
+disks where they do.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from fastapi import UploadFile
+from sqlalchemy import event, insert, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings  # noqa: E402, F401  reads .env before leaving
+
+# The app keeps its database (resolved when the engine is created) and media
+# relative to the working directory, so run in a scratch one
+os.chdir(tempfile.mkdtemp(prefix="bench-"))
+
+import media  # noqa: E402
+import models  # noqa: E402
+from database import AsyncSessionLocal, Base, commit_engine, engine  # noqa: E402
+from jobs import job_queue  # noqa: E402
+from occupancy import occupancy_cache  # noqa: E402
+from routers.bookings import create_booking  # noqa: E402
+from routers.cars import car_list_cache, create_car  # noqa: E402
+from schemas import BookingCreate  # noqa: E402
+
+EPOCH = datetime(2030, 1, 1, tzinfo=UTC)
+
+
+def booking_for(i: int) -> BookingCreate:
+    start = EPOCH + timedelta(days=3 * i)
+    return BookingCreate(car_id=1, start_date=start, end_date=start + timedelta(days=1))
+
+
+def upload_for(i: int) -> UploadFile:
+    return UploadFile(io.BytesIO(b"\xff\xd8\xff%d" % i), filename="car.jpg")
+
+
+async def old_create_booking(booking: BookingCreate, current_user, db) -> None:
+    result = await db.execute(select(models.Car).where(models.Car.id == booking.car_id))
+    if not result.scalars().first():
+        raise ValueError("car not found")
+    result = await db.execute(
+        select(models.Booking)
+        .where(models.Booking.car_id == booking.car_id)
+        .where(models.Booking.status == "active")
+        .where(
+            (models.Booking.start_date <= booking.end_date)
+            & (models.Booking.end_date >= booking.start_date)
+        )
+    )
+    if result.scalars().first():
+        raise ValueError("overlap")
+    new_booking = models.Booking(
+        user_id=current_user.id,
+        car_id=booking.car_id,
+        start_date=booking.start_date,
+        end_date=booking.end_date,
+    )
+    db.add(new_booking)
+    await db.commit()
+    await db.refresh(new_booking)
+    await db.commit()
+    await occupancy_cache.invalidate(str(booking.car_id))
+
+
+async def old_create_car(i: int, current_user, db) -> None:
+    image_file = await media.save_upload(upload_for(i), "car_images")
+    new_car = models.Car(
+        owner_id=current_user.id,
+        brand="Brand",
+        model=f"Model {i}",
+        year=2020,
+        price_per_day=1000,
+        location="Kochi",
+        contact_number="9999999999",
+        image_file=image_file,
+    )
+    db.add(new_car)
+    job_queue.enqueue(db, "precompress_media", path=f"car_images/{image_file}")
+    await db.commit()
+    await db.refresh(new_car)
+    # The old handler published this while refresh still held a connection,
+    # which exhausts the pool at these concurrencies; release it first
+    await db.close()
+    await car_list_cache.invalidate()
+
+
+async def new_create_car(i: int, current_user, db) -> None:
+    await create_car(
+        brand="Brand",
+        model=f"Model {i}",
+        year=2020,
+        price_per_day=1000,
+        location="Kochi",
+        contact_number="9999999999",
+        image=upload_for(i),
+        current_user=current_user,
+        db=db,
+    )
+
+
+async def request(handler) -> None:
+    async with AsyncSessionLocal() as db:
+        # What the CurrentUser dependency leaves behind: a session that has
+        # already run a query and holds its connection
+        current_user = await db.get(models.User, 1)
+        await handler(current_user, db)
+
+
+async def drive(clients: int, operations: int, operation) -> float:
+    counter = iter(range(operations))
+
+    async def client():
+        for i in counter:
+            await operation(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return operations / (time.perf_counter() - started)
+
+
+async def run(client_counts: list[int], operations: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(models.User).values(
+                id=1, username="bench", email="bench@example.com", password_hash="x"
+            )
+        )
+        await conn.execute(
+            insert(models.Car).values(
+                id=1,
+                owner_id=1,
+                brand="Brand",
+                model="Model",
+                year=2020,
+                price_per_day=1000,
+                location="Kochi",
+                contact_number="9999999999",
+                image_file="car.jpg",
+            )
+        )
+
+    offset = 0
+    for clients in client_counts:
+        cases = [
+            (
+                "booking, per request",
+                lambda i, base=offset: request(
+                    lambda user, db: old_create_booking(booking_for(base + i), user, db)
+                ),
+            ),
+            (
+                "booking, group commit",
+                lambda i, base=offset + operations: request(
+                    lambda user, db: create_booking(booking_for(base + i), user, db)
+                ),
+            ),
+            (
+                "car, per request",
+                lambda i: request(lambda user, db: old_create_car(i, user, db)),
+            ),
+            (
+                "car, group commit",
+                lambda i: request(lambda user, db: new_create_car(i, user, db)),
+            ),
+        ]
+        for label, operation in cases:
+            ops = await drive(clients, operations, operation)
+            print(f"{clients:>7} {label:<24}{ops:>10.0f} ops/s")
+        offset += 2 * operations
+    await engine.dispose()
+    await commit_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--operations", type=int, default=1000)
+    parser.add_argument(
+        "--synchronous", choices=["OFF", "NORMAL", "FULL"], default="NORMAL"
+    )
+    args = parser.parse_args()
+
+    def set_synchronous(dbapi_connection, _connection_record):
+        # Runs after the app's own pragmas
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA synchronous={args.synchronous}")
+        cursor.close()
+
+    for app_engine in (engine, commit_engine):
+        event.listen(app_engine.sync_engine, "connect", set_synchronous)
+
+    print(f"{'clients':>7} {'write':<24}{'throughput':>10}")
+    asyncio.run(run(args.clients, args.operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+import models
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[str], None]
+
+# Key meaning "drop everything on this channel"
+ALL = "*"
+
+
+class LocalBus:
+    """Delivers invalidations to subscribers in the current process only."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, list[Subscriber]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Subscriber) -> None:
+        self._subscribers[channel].append(callback)
+
+    async def publish(self, channel: str, key: str = ALL) -> None:
+        self._deliver(channel, key)
+
+    def publish_on_commit(self, db: AsyncSession, channel: str, key: str = ALL) -> None:
+        """Publish once the caller's transaction commits, as part of it."""
+        db.info.setdefault("invalidations", []).append((channel, key))
+
+    def _deliver(self, channel: str, key: str) -> None:
+        for callback in self._subscribers.get(channel, ()):
+            try:
+                callback(key)
+            except Exception:
+                logger.exception("Invalidation subscriber failed on %s", channel)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class SQLitePollingBus(LocalBus):
+    """Shares invalidations between workers through the ``invalidations`` table.
+
+    Publishing delivers locally straight away and records the message; every
+    worker polls for rows newer than the last one it has seen.
+    """
+
+    def __init__(self, poll_interval: float = 0.2, retention: float = 60.0) -> None:
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._last_id = 0
+        self._poller: asyncio.Task | None = None
+
+    async def publish(self, channel: str, key: str = ALL) -> None:
+        self._deliver(channel, key)
+        async with AsyncSessionLocal() as db:
+            db.add(
+                models.Invalidation(
+                    channel=channel, key=key, created_at=datetime.now(UTC)
+                )
+            )
+            await db.commit()
+
+    def publish_on_commit(self, db: AsyncSession, channel: str, key: str = ALL) -> None:
+        # The message row commits with the change itself, so invalidating
+        # costs no commit of its own
+        super().publish_on_commit(db, channel, key)
+        db.add(models.Invalidation(channel=channel, key=key, created_at=datetime.now(UTC)))
+
+    async def start(self) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(func.max(models.Invalidation.id)))
+            self._last_id = result.scalar() or 0
+        self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._poller:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+
+    async def _poll(self) -> None:
+        polls = 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._receive()
+                polls += 1
+                if polls * self.poll_interval >= self.retention:
+                    polls = 0
+                    await self._prune()
+            except Exception:
+                logger.exception("Failed to poll invalidations")
+
+    async def _receive(self) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    models.Invalidation.id,
+                    models.Invalidation.channel,
+                    models.Invalidation.key,
+                )
+                .where(models.Invalidation.id > self._last_id)
+                .order_by(models.Invalidation.id)
+            )
+            for message_id, channel, key in result.all():
+                self._last_id = message_id
+                self._deliver(channel, key)
+
+    async def _prune(self) -> None:
+        cutoff = datetime.now(UTC) - timedelta(seconds=self.retention)
+        newest = select(func.max(models.Invalidation.id)).scalar_subquery()
+        async with AsyncSessionLocal() as db:
+            # Keep the newest row too, for tables created without
+            # AUTOINCREMENT: SQLite hands out max(id) + 1 to the next message
+            await db.execute(
+                delete(models.Invalidation)
+                .where(models.Invalidation.created_at < cutoff)
+                .where(models.Invalidation.id < newest)
+            )
+            await db.commit()
+
+
+def create_bus(kind: str) -> LocalBus:
+    if kind == "local":
+        return LocalBus()
+    if kind == "sqlite":
+        return SQLitePollingBus(poll_interval=settings.invalidation_poll_interval)
+    raise ValueError(f"Unknown invalidation bus: {kind}")
+
+
+bus = create_bus(settings.invalidation_bus)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    for channel, key in session.info.pop("invalidations", ()):
+        bus._deliver(channel, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("invalidations", None)
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bus import ALL, bus
+
+
+class Cache:
+    """Per-process TTL cache kept coherent across workers through the bus.
+
+    Entries are dropped when a message for their key (or ``ALL``) arrives on
+    the channel named after the cache, whichever worker published it.
+    """
+
+    def __init__(self, name: str, ttl: float = 60.0, maxsize: int = 1024) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self._invalidated_at = float("-inf")
+        bus.subscribe(name, self._on_invalidate)
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is None:
+            generation = self._generation
+            value = await loader()
+            # Don't store a value that was invalidated while it was loading
+            if generation == self._generation:
+                self.set(key, value)
+        return value
+
+    async def get_many_or_load(
+        self,
+        keys: list[str],
+        loader: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        """Like ``get_or_load`` for several keys, loading the misses at once.
+
+        ``loader`` gets the missing keys and must return a value for each.
+        """
+        values = {}
+        missing = []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+        if missing:
+            generation = self._generation
+            loaded = await loader(missing)
+            if generation == self._generation:
+                for key, value in loaded.items():
+                    self.set(key, value)
+            values.update(loaded)
+        return values
+
+    async def invalidate(self, key: str = ALL) -> None:
+        """Drop ``key`` here and in every other worker."""
+        await bus.publish(self.name, key)
+
+    def invalidate_on_commit(self, db: AsyncSession, key: str = ALL) -> None:
+        """Like ``invalidate``, once ``db``'s transaction commits."""
+        bus.publish_on_commit(db, self.name, key)
+
+    def invalidated_within(self, seconds: float) -> bool:
+        """Whether an invalidation arrived here in the last ``seconds``."""
+        return time.monotonic() - self._invalidated_at < seconds
+
+    def _on_invalidate(self, key: str) -> None:
+        self._generation += 1
+        self._invalidated_at = time.monotonic()
+        if key == ALL:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
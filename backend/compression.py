@@ -0,0 +1,209 @@
+import zlib
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int = 4) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor:
+    encoding = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# Server preference when a client accepts several encodings
+COMPRESSORS = {
+    "zstd": ZstdCompressor if zstandard is not None else None,
+    "br": BrotliCompressor if brotli is not None else None,
+    "gzip": GzipCompressor,
+}
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings named in an Accept-Encoding header, minus those with q=0."""
+    accepted = set()
+    for token in header.split(","):
+        name, *params = (part.strip() for part in token.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts.
+
+    Bodies under ``minimum_size`` and content types outside
+    ``compressible_types`` pass through untouched, as do responses that
+    are already encoded (precompressed media) or partial. Chunks of
+    ``thread_minimum_size`` or more are compressed in a worker thread so a
+    large catalog response doesn't stall the event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        thread_minimum_size: int = 256 * 1024,
+        compressible_types: tuple[str, ...] = COMPRESSIBLE_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.compressible_types = compressible_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, compressor_class in COMPRESSORS.items():
+            if compressor_class is not None and encoding in accepted:
+                responder = CompressionResponder(self, compressor_class)
+                await self.app(scope, receive, responder.wrap(send))
+                return
+        await self.app(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, compressor_class) -> None:
+        self.middleware = middleware
+        self.compressor_class = compressor_class
+        self.compressor = None
+        self.start_message: Message | None = None
+        self.passthrough = False
+
+    def wrap(self, send: Send) -> Send:
+        async def send_compressed(message: Message) -> None:
+            await self.send(message, send)
+
+        return send_compressed
+
+    def should_compress(self, headers: Headers, status: int) -> bool:
+        if status in (204, 206, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(self.middleware.compressible_types)
+
+    async def _run(self, method, body: bytes) -> bytes:
+        if len(body) >= self.middleware.thread_minimum_size:
+            return await anyio.to_thread.run_sync(method, body)
+        return method(body)
+
+    async def send(self, message: Message, send: Send) -> None:
+        if self.passthrough:
+            await send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if self.should_compress(headers, message["status"]):
+                self.start_message = message
+            else:
+                self.passthrough = True
+                await send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            # e.g. pathsend: nothing to compress, release the held headers
+            if self.start_message is not None:
+                self.passthrough = True
+                await send(self.start_message)
+            await send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            start_message, self.start_message = self.start_message, None
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                MutableHeaders(raw=start_message["headers"]).add_vary_header(
+                    "Accept-Encoding"
+                )
+                await send(start_message)
+                await send(message)
+                return
+
+            self.compressor = self.compressor_class()
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = self.compressor.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                body = await self._run(self.compressor.compress, body)
+            else:
+                body = await self._run(self.compressor.finish, body)
+                headers["Content-Length"] = str(len(body))
+            await send(start_message)
+            await send({**message, "body": body})
+            return
+
+        if more_body:
+            body = await self._run(self.compressor.compress, body)
+        else:
+            body = await self._run(self.compressor.finish, body)
+        await send({**message, "body": body})
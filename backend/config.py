@@ -7,9 +7,28 @@ class Settings(BaseSettings):
         env_file=".env", env_file_encoding="utf-8", extra="allow"
     )
 
+    environment: str = "development"
+
     secret_key: SecretStr
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    job_poll_interval: float = 1.0
+    job_drain_timeout: float = 10.0
+    # Longer than any job runs; claims older than this are treated as crashed
+    job_lease_timeout: float = 600.0
+
+    invalidation_bus: str = "sqlite"
+    invalidation_poll_interval: float = 0.2
+
+    group_commit_max_batch: int = 64
+
+    replica_database_url: str | None = None
+    # How long a user's reads stay on the primary after they write
+    read_your_writes_window: float = 5.0
+
+    booking_archive_after_days: int = 30
+    booking_archive_batch_size: int = 1000
+
 
 settings = Settings()  # type: ignore[call-arg]
@@ -1,23 +1,93 @@
 from typing import Annotated
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
+from config import settings
+
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./car_rental.db"
 
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+# Group commits (unit_of_work.py) run one batch at a time on a connection of
+# their own, so requests can keep theirs while they wait for one
+commit_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=1,
+    max_overflow=0,
+)
+
+# Read-only endpoints may use a replica (see replica.py); without one they
+# share the primary
+if settings.replica_database_url is None:
+    replica_engine = engine
+elif settings.replica_database_url.startswith("sqlite"):
+    replica_engine = create_async_engine(
+        settings.replica_database_url, connect_args={"check_same_thread": False}
+    )
+else:
+    replica_engine = create_async_engine(settings.replica_database_url)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+    # WAL lets readers in other worker processes proceed during a write
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+event.listen(commit_engine.sync_engine, "connect", _set_sqlite_pragmas)
+if replica_engine is not engine and replica_engine.dialect.name == "sqlite":
+    event.listen(replica_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+CommitSessionLocal = async_sessionmaker(
+    commit_engine, class_=AsyncSession, expire_on_commit=False
+)
+ReplicaSessionLocal = async_sessionmaker(
+    replica_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 class Base(DeclarativeBase):
     pass
 
 
+async def create_schema() -> None:
+    """Create the tables the database is missing from the models.
+
+    Only for development; elsewhere the schema is managed by migrations.
+    """
+    import models  # noqa: F401  registers the tables on Base.metadata
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def index_names(conn: AsyncConnection) -> set[str]:
+    """Names of the indexes that exist in the database."""
+    if conn.dialect.name == "sqlite":
+        query = "SELECT name FROM sqlite_master WHERE type = 'index'"
+    else:
+        query = "SELECT indexname FROM pg_indexes"
+    return set((await conn.execute(text(query))).scalars())
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
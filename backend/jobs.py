@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+import models
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[None]]
+
+
+@dataclass
+class JobType:
+    handler: Handler
+    concurrency: int
+    max_attempts: int
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+class JobQueue:
+    """In-process worker for jobs stored in the ``jobs`` outbox table.
+
+    Jobs are written in the same transaction as the change that caused them,
+    so they are only picked up once that change is committed and survive a
+    restart if the process dies before running them.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 1.0,
+        lease_timeout: float = 600.0,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+    ) -> None:
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._types: dict[str, JobType] = {}
+        self._running: dict[str, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+        self._stopping = False
+
+    def handler(self, kind: str, *, concurrency: int = 1, max_attempts: int = 5):
+        """Register a coroutine function as the handler for ``kind`` jobs."""
+
+        def decorator(func: Handler) -> Handler:
+            self._types[kind] = JobType(func, concurrency, max_attempts)
+            return func
+
+        return decorator
+
+    def enqueue(
+        self, db: AsyncSession, kind: str, *, delay: float = 0.0, **payload
+    ) -> None:
+        """Add a job to the caller's transaction; it runs after the commit.
+
+        With ``delay``, not before that many seconds have passed.
+        """
+        if kind not in self._types:
+            raise ValueError(f"Unknown job type: {kind}")
+        run_after = _now() + timedelta(seconds=delay)
+        db.add(models.Job(kind=kind, payload=json.dumps(payload), run_after=run_after))
+        db.info["jobs_enqueued"] = True
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        # Jobs claimed longer ago than the lease belong to a worker that died;
+        # newer claims may still be running in a sibling worker
+        stale = _now() - timedelta(seconds=self.lease_timeout)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(models.Job)
+                .where(models.Job.status == "running")
+                .where(
+                    models.Job.claimed_at.is_(None) | (models.Job.claimed_at < stale)
+                )
+                .values(status="pending")
+            )
+            await db.commit()
+        self._stopping = False
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Stop claiming jobs and wait up to ``timeout`` for in-flight ones."""
+        self._stopping = True
+        self.wake()
+        if self._dispatcher:
+            await self._dispatcher
+            self._dispatcher = None
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Cancelled %d unfinished jobs on shutdown", len(pending))
+            await asyncio.wait(pending)
+
+    async def _dispatch(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                await self._claim_due()
+            except Exception:
+                logger.exception("Failed to claim jobs")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+
+    async def _claim_due(self) -> None:
+        free_slots = {
+            kind: job_type.concurrency - self._running.get(kind, 0)
+            for kind, job_type in self._types.items()
+        }
+        async with AsyncSessionLocal() as db:
+            for kind, slots in free_slots.items():
+                if slots <= 0:
+                    continue
+                result = await db.execute(
+                    select(models.Job.id, models.Job.payload, models.Job.attempts)
+                    .where(models.Job.kind == kind)
+                    .where(models.Job.status == "pending")
+                    .where(models.Job.run_after <= _now())
+                    .order_by(models.Job.id)
+                    .limit(slots)
+                )
+                for job_id, payload, attempts in result.all():
+                    # Guard against another worker claiming the same row
+                    claimed = await db.execute(
+                        update(models.Job)
+                        .where(models.Job.id == job_id)
+                        .where(models.Job.status == "pending")
+                        .values(status="running", claimed_at=_now())
+                    )
+                    await db.commit()
+                    if claimed.rowcount:
+                        self._spawn(job_id, kind, payload, attempts)
+
+    def _spawn(self, job_id: int, kind: str, payload: str, attempts: int) -> None:
+        self._running[kind] = self._running.get(kind, 0) + 1
+        task = asyncio.create_task(self._run(job_id, kind, payload, attempts))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: int, kind: str, payload: str, attempts: int) -> None:
+        job_type = self._types[kind]
+        try:
+            await job_type.handler(**json.loads(payload))
+        except Exception as exc:
+            attempts += 1
+            values: dict = {"attempts": attempts, "last_error": repr(exc)}
+            if attempts >= job_type.max_attempts:
+                logger.exception("Job %s (%s) failed permanently", job_id, kind)
+                values["status"] = "failed"
+            else:
+                logger.warning("Job %s (%s) failed, retrying: %r", job_id, kind, exc)
+                delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+                values["status"] = "pending"
+                values["run_after"] = _now() + timedelta(seconds=delay)
+            statement = (
+                update(models.Job).where(models.Job.id == job_id).values(**values)
+            )
+        else:
+            statement = delete(models.Job).where(models.Job.id == job_id)
+        finally:
+            self._running[kind] -= 1
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(statement)
+            await db.commit()
+        self.wake()
+
+
+job_queue = JobQueue(
+    poll_interval=settings.job_poll_interval,
+    lease_timeout=settings.job_lease_timeout,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        job_queue.wake()
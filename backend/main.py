@@ -1,26 +1,38 @@
 from contextlib import asynccontextmanager
+from functools import cache
 from fastapi import FastAPI, Request, status
 from fastapi.exception_handlers import (
     http_exception_handler,
     request_validation_exception_handler,
 )
 from fastapi.exceptions import RequestValidationError
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from routers import bookings, cars, users
 
-from database import Base, engine
+from database import commit_engine, create_schema, engine, replica_engine
+from config import settings
+from jobs import job_queue
+from bus import bus
+from media import MediaFiles
+from compression import CompressionMiddleware
+from replica import WRITE_MARKER_HEADER, ReadYourWritesMiddleware, has_replica
 
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Outside development the schema is managed by migrations
+    if settings.environment == "development":
+        await create_schema()
+    await bus.start()
+    await job_queue.start()
     yield
+    await job_queue.drain(settings.job_drain_timeout)
+    await bus.stop()
     await engine.dispose()
+    await commit_engine.dispose()
+    await replica_engine.dispose()
 
 
 app = FastAPI(
@@ -28,13 +40,25 @@ app = FastAPI(
     title="Car Rental API",
     description="API for a car rental service",
 )
-templates = Jinja2Templates(directory="templates")
 
+
+@cache
+def get_templates():
+    # Jinja is only needed for non-API error pages, so load it on first use
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory="templates")
+
+
+if has_replica():
+    app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[WRITE_MARKER_HEADER],
 )
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(cars.router, prefix="/api/cars", tags=["cars"])
@@ -44,7 +68,7 @@ app.include_router(bookings.router, prefix="/api/bookings", tags=["bookings"])
 # app.include_router(posts.router, prefix="/api/posts", tags=["posts"])
 
 # app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/media", StaticFiles(directory="media"), name="media")
+app.mount("/media", MediaFiles(directory="media"), name="media")
 #
 #
 # @app.get("/", include_in_schema=False, name="home")
@@ -133,7 +157,7 @@ async def general_http_exception_handler(
         if exception.detail
         else "An error occured. Please check your request again"
     )
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request,
         "error.html",
         {
@@ -151,7 +175,7 @@ async def validation_exception_handler(
 ):
     if request.url.path.startswith("/api"):
         return await request_validation_exception_handler(request, exception)
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request,
         "error.html",
         {
@@ -0,0 +1,253 @@
+"""Schema and fixture management.
+
+uv run manage.py migrate            # apply migrations up to head
+uv run manage.py check              # fail if models and database differ
+uv run manage.py seed --users 100000 --cars 20000 --bookings 500000
+uv run manage.py explain            # query plans of the hot queries
+uv run manage.py archive            # move finished bookings to bookings_history
+uv run manage.py replicate          # keep a local SQLite replica in sync
+uv run manage.py precompress ../frontend
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.util import AutogenerateDiffsDetected, CommandError
+from sqlalchemy import func, insert, make_url, select, text
+
+import archive
+from auth import hash_password
+import media
+import models
+from config import settings
+from database import SQLALCHEMY_DATABASE_URL, Base, engine, index_names
+
+ALEMBIC_CONFIG = Path(__file__).resolve().parent / "alembic.ini"
+
+
+def alembic_config() -> Config:
+    return Config(str(ALEMBIC_CONFIG))
+
+
+async def missing_indexes() -> list[str]:
+    """Named indexes in the models that the database doesn't have.
+
+    Alembic can't reflect expression indexes on SQLite, so ``alembic check``
+    alone would miss e.g. ``ix_users_email_lower``.
+    """
+    expected = {
+        index.name for table in Base.metadata.tables.values() for index in table.indexes
+    }
+    async with engine.connect() as conn:
+        present = await index_names(conn)
+    await engine.dispose()
+    return sorted(expected - present)
+
+
+def check() -> bool:
+    try:
+        command.check(alembic_config())
+    except (AutogenerateDiffsDetected, CommandError) as exc:
+        print(exc, file=sys.stderr)
+        return False
+    missing = asyncio.run(missing_indexes())
+    if missing:
+        print(f"Missing indexes: {', '.join(missing)}", file=sys.stderr)
+        return False
+    return True
+
+
+async def seed(users: int, cars: int, bookings: int, chunk_size: int = 10_000) -> None:
+    """Bulk-insert synthetic rows for exercising queries and migrations."""
+    rng = random.Random(0)
+    # Hashing is deliberately slow; every fixture user shares one password
+    password = hash_password("fixture-password")
+    async with engine.begin() as conn:
+        user_offset = (
+            await conn.execute(select(func.max(models.User.id)))
+        ).scalar() or 0
+        car_offset = (await conn.execute(select(func.max(models.Car.id)))).scalar() or 0
+
+        for start in range(0, users, chunk_size):
+            rows = [
+                {
+                    "username": f"User{user_offset + i}",
+                    "email": f"user{user_offset + i}@example.com",
+                    "password_hash": password,
+                }
+                for i in range(start + 1, min(start + chunk_size, users) + 1)
+            ]
+            await conn.execute(insert(models.User), rows)
+
+        user_ids = range(1, user_offset + users + 1)
+        for start in range(0, cars, chunk_size):
+            rows = [
+                {
+                    "owner_id": rng.choice(user_ids),
+                    "brand": rng.choice(["Toyota", "Honda", "Hyundai", "Tata"]),
+                    "model": f"Model {i}",
+                    "year": rng.randint(2005, 2025),
+                    "price_per_day": rng.randint(1000, 10000),
+                    "location": rng.choice(["Kochi", "Chennai", "Bengaluru"]),
+                    "contact_number": "9999999999",
+                    "image_file": "fixture.jpg",
+                    "status": "available",
+                }
+                for i in range(start, min(start + chunk_size, cars))
+            ]
+            await conn.execute(insert(models.Car), rows)
+
+        car_ids = range(1, car_offset + cars + 1)
+        today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        for start in range(0, bookings, chunk_size):
+            rows = []
+            for _ in range(start, min(start + chunk_size, bookings)):
+                start_date = today + timedelta(days=rng.randint(-730, 180))
+                rows.append(
+                    {
+                        "user_id": rng.choice(user_ids),
+                        "car_id": rng.choice(car_ids),
+                        "start_date": start_date,
+                        "end_date": start_date + timedelta(days=rng.randint(1, 14)),
+                    }
+                )
+            await conn.execute(insert(models.Booking), rows)
+    await engine.dispose()
+
+
+def hot_queries():
+    now = datetime.now(UTC)
+    return {
+        "booking overlap": select(models.Booking)
+        .where(models.Booking.car_id == 1)
+        .where(models.Booking.status == "active")
+        .where(models.Booking.start_date <= now + timedelta(days=3))
+        .where(models.Booking.end_date >= now),
+        "my bookings": select(models.Booking)
+        .where(models.Booking.user_id == 1)
+        .where(models.Booking.status == "active")
+        .order_by(models.Booking.start_date.desc()),
+        "my cars": select(models.Car).where(models.Car.owner_id == 1),
+        "login by email": select(models.User).where(
+            func.lower(models.User.email) == "user1@example.com"
+        ),
+        "username taken": select(models.User).where(
+            func.lower(models.User.username) == "user1"
+        ),
+    }
+
+
+async def explain() -> None:
+    async with engine.connect() as conn:
+        prefix = "EXPLAIN QUERY PLAN" if conn.dialect.name == "sqlite" else "EXPLAIN"
+        for name, query in hot_queries().items():
+            sql = query.compile(conn, compile_kwargs={"literal_binds": True})
+            result = await conn.execute(text(f"{prefix} {sql}"))
+            print(f"{name}:")
+            for row in result:
+                print(f"  {row[-1]}")
+    await engine.dispose()
+
+
+async def archive_bookings(older_than_days: int, batch_size: int) -> None:
+    cutoff = datetime.now(UTC) - timedelta(days=older_than_days)
+    archived = await archive.archive_bookings(cutoff, batch_size)
+    print(f"Archived {archived} bookings")
+    await engine.dispose()
+
+
+def replicate(interval: float, once: bool = False) -> None:
+    """Copy the primary into the replica database every ``interval`` seconds.
+
+    A stand-in for streaming replication when developing against SQLite:
+    reads routed to the replica lag writes by up to ``interval``.
+    """
+    if settings.replica_database_url is None:
+        sys.exit("REPLICA_DATABASE_URL is not set")
+    replica_url = make_url(settings.replica_database_url)
+    if replica_url.get_backend_name() != "sqlite":
+        sys.exit("replicate only copies SQLite databases")
+
+    primary = sqlite3.connect(make_url(SQLALCHEMY_DATABASE_URL).database)
+    replica = sqlite3.connect(replica_url.database)
+    replica.execute("PRAGMA busy_timeout=5000")
+    try:
+        while True:
+            started = time.perf_counter()
+            primary.backup(replica)
+            print(f"Replicated in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if once:
+                return
+            time.sleep(interval)
+    finally:
+        replica.close()
+        primary.close()
+
+
+def precompress(directory: Path) -> None:
+    """Write .gz/.br variants next to every compressible file in a tree."""
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+        for variant in media.precompress(path):
+            print(f"{variant}: {path.stat().st_size} -> {variant.stat().st_size} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the car rental database")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser(
+        "migrate", help="upgrade the database to the latest revision"
+    )
+    subcommands.add_parser("check", help="exit non-zero if models and database drift")
+    seed_parser = subcommands.add_parser("seed", help="insert performance fixtures")
+    seed_parser.add_argument("--users", type=int, default=10_000)
+    seed_parser.add_argument("--cars", type=int, default=2_000)
+    seed_parser.add_argument("--bookings", type=int, default=50_000)
+    subcommands.add_parser("explain", help="show query plans of the hot queries")
+    archive_parser = subcommands.add_parser(
+        "archive", help="move finished bookings into bookings_history"
+    )
+    archive_parser.add_argument(
+        "--older-than-days", type=int, default=settings.booking_archive_after_days
+    )
+    archive_parser.add_argument(
+        "--batch-size", type=int, default=settings.booking_archive_batch_size
+    )
+    replicate_parser = subcommands.add_parser(
+        "replicate", help="copy the database to REPLICA_DATABASE_URL periodically"
+    )
+    replicate_parser.add_argument("--interval", type=float, default=2.0)
+    replicate_parser.add_argument("--once", action="store_true")
+    precompress_parser = subcommands.add_parser(
+        "precompress", help="write precompressed variants of static assets"
+    )
+    precompress_parser.add_argument("directory", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        command.upgrade(alembic_config(), "head")
+    elif args.command == "check":
+        sys.exit(0 if check() else 1)
+    elif args.command == "seed":
+        asyncio.run(seed(args.users, args.cars, args.bookings))
+    elif args.command == "explain":
+        asyncio.run(explain())
+    elif args.command == "archive":
+        asyncio.run(archive_bookings(args.older_than_days, args.batch_size))
+    elif args.command == "replicate":
+        replicate(args.interval, args.once)
+    elif args.command == "precompress":
+        precompress(args.directory)
+
+
+if __name__ == "__main__":
+    main()
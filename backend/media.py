@@ -0,0 +1,192 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from compression import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are always produced
+    brotli = None
+
+MEDIA_ROOT = Path("media")
+
+# Media files are never rewritten under an existing name (uploads are named
+# after their content), so a URL can be cached forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Already-compressed formats gain nothing from another pass
+INCOMPRESSIBLE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+# Longer than any upload takes to commit the row that refers to its file
+UPLOAD_COMMIT_GRACE = 600.0
+
+
+def _store(source, folder: str, suffix: str) -> str:
+    directory = MEDIA_ROOT / folder
+    directory.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as buffer:
+        try:
+            while chunk := source.read(1024 * 1024):
+                digest.update(chunk)
+                buffer.write(chunk)
+        except BaseException:
+            os.unlink(buffer.name)
+            raise
+    filename = f"{digest.hexdigest()[:32]}{suffix.lower()}"
+    os.replace(buffer.name, directory / filename)
+    return filename
+
+
+async def save_upload(upload: UploadFile, folder: str) -> str:
+    """Store an upload under ``media/<folder>`` and return its hashed filename."""
+    suffix = os.path.splitext(upload.filename or "")[1]
+    return await anyio.to_thread.run_sync(_store, upload.file, folder, suffix)
+
+
+def compressible(path: str | Path) -> bool:
+    """Whether ``path`` has a known type that compression might shrink."""
+    media_type, _ = mimetypes.guess_type(path)
+    return media_type is not None and media_type not in INCOMPRESSIBLE_TYPES
+
+
+def precompress(path: Path, min_saving: float = 0.1) -> list[Path]:
+    """Write ``.br``/``.gz`` siblings of ``path`` when they're worth serving."""
+    if not compressible(path):
+        return []
+    data = path.read_bytes()
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) <= len(data) * (1 - min_saving):
+            variant = path.with_name(path.name + suffix)
+            # Write then rename so a half-written variant is never served
+            partial = variant.with_name(variant.name + ".tmp")
+            partial.write_bytes(compressed)
+            os.replace(partial, variant)
+            written.append(variant)
+    return written
+
+
+def remove(path: Path) -> None:
+    """Delete a media file along with its precompressed variants."""
+    for candidate in (path, *(path.with_name(path.name + s) for s in (".br", ".gz"))):
+        candidate.unlink(missing_ok=True)
+
+
+def discard(path: Path, grace: float = UPLOAD_COMMIT_GRACE) -> bool:
+    """Remove an unreferenced media file unless an upload just wrote it.
+
+    Files are named by content, so an upload of the same content replaces
+    the file before the row referring to it commits; one written in the last
+    ``grace`` seconds is kept. The file is moved aside before its age is
+    checked, so an upload landing meanwhile is never the one removed.
+    Returns whether the file was removed.
+    """
+    aside = path.with_name(path.name + ".discard")
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:
+        remove(path)
+        return True
+    if time.time() - aside.stat().st_mtime < grace:
+        try:
+            os.link(aside, path)
+        except FileExistsError:
+            pass  # a newer upload of the same content already took its place
+        aside.unlink()
+        return False
+    aside.unlink()
+    # Variants only; the name may already belong to a newer upload
+    for suffix in (".br", ".gz"):
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+    return True
+
+
+class MediaFileResponse(FileResponse):
+    """File response that hands the file to the server when it can sendfile.
+
+    Servers advertising the ASGI ``http.response.zerocopy`` extension get the
+    open file; everything else (including range requests) falls back to
+    Starlette's chunked reads.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            "http.response.zerocopy" not in scope.get("extensions", {})
+            or scope["method"] != "GET"
+            or "range" in Headers(scope=scope)
+        ):
+            return await super().__call__(scope, receive, send)
+
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send(
+                {"type": "http.response.zerocopy", "file": file, "more_body": False}
+            )
+        finally:
+            file.close()
+
+
+class MediaFiles(StaticFiles):
+    """Serves media with far-future caching and precompressed variants."""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Cache-Control": IMMUTABLE}
+
+        if media_type not in INCOMPRESSIBLE_TYPES:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix in ENCODINGS.items():
+                if encoding not in accepted:
+                    continue
+                try:
+                    variant_stat = os.stat(f"{full_path}{suffix}")
+                except OSError:
+                    continue
+                full_path, stat_result = f"{full_path}{suffix}", variant_stat
+                headers["Content-Encoding"] = encoding
+                break
+
+        response = MediaFileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
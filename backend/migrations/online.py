@@ -0,0 +1,37 @@
+"""Index operations that don't block writers while they run.
+
+PostgreSQL builds and drops indexes ``CONCURRENTLY``, which has to happen
+outside a transaction. SQLite has no such option; its index builds are
+short enough at this app's sizes to run in the migration transaction.
+"""
+
+from alembic import op
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def create_index(name: str, table: str, columns: list, **kw) -> None:
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kw,
+            )
+    else:
+        op.create_index(name, table, columns, if_not_exists=True, **kw)
+
+
+def drop_index(name: str, table: str) -> None:
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,56 @@
+"""Performance indexes
+
+Composite booking indexes for the overlap check and "my bookings", unique
+indexes on lower(username)/lower(email) for case-insensitive lookups and
+an index on cars.owner_id. The single-column booking indexes are prefixes
+of the new composites and are dropped.
+
+Revision ID: 0002
+Revises: 0001b
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from migrations import online
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    online.create_index(
+        "ix_bookings_car_id_start_date_end_date",
+        "bookings",
+        ["car_id", "start_date", "end_date"],
+    )
+    online.create_index(
+        "ix_bookings_user_id_start_date", "bookings", ["user_id", "start_date"]
+    )
+    online.drop_index("ix_bookings_car_id", "bookings")
+    online.drop_index("ix_bookings_user_id", "bookings")
+    online.create_index(
+        "ix_users_username_lower", "users", [sa.text("lower(username)")], unique=True
+    )
+    online.create_index(
+        "ix_users_email_lower", "users", [sa.text("lower(email)")], unique=True
+    )
+    online.create_index("ix_cars_owner_id", "cars", ["owner_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    online.drop_index("ix_cars_owner_id", "cars")
+    online.drop_index("ix_users_email_lower", "users")
+    online.drop_index("ix_users_username_lower", "users")
+    online.create_index("ix_bookings_user_id", "bookings", ["user_id"])
+    online.create_index("ix_bookings_car_id", "bookings", ["car_id"])
+    online.drop_index("ix_bookings_user_id_start_date", "bookings")
+    online.drop_index("ix_bookings_car_id_start_date_end_date", "bookings")
@@ -0,0 +1,65 @@
+"""Booking lifecycle and history
+
+Bookings get a status (active/completed/cancelled) instead of being deleted
+when they end, and a ``bookings_history`` table that ``manage.py archive``
+moves finished bookings into. Existing bookings become active.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default makes this a metadata-only change on both backends
+    op.add_column(
+        "bookings",
+        sa.Column(
+            "status", sa.String(length=20), nullable=False, server_default="active"
+        ),
+    )
+    op.create_table(
+        "bookings_history",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("car_id", sa.Integer(), nullable=False),
+        sa.Column("start_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_bookings_history_start_date", "bookings_history", ["start_date"]
+    )
+    op.create_index(
+        "ix_bookings_history_user_id_start_date",
+        "bookings_history",
+        ["user_id", "start_date"],
+    )
+    op.create_index(
+        "ix_bookings_history_car_id_start_date",
+        "bookings_history",
+        ["car_id", "start_date"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("bookings_history")
+    with op.batch_alter_table("bookings") as batch_op:
+        batch_op.drop_column("status")
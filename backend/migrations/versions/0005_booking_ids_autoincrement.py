@@ -0,0 +1,53 @@
+"""Never reuse booking ids
+
+Bookings keep their id when they move to ``bookings_history``. SQLite
+reuses the highest rowid once that row is deleted, so a new booking could
+collide with an archived one. The table is rebuilt with AUTOINCREMENT and
+its sequence starts above every id in either table. PostgreSQL sequences
+never go back, so there is nothing to do there.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild_bookings(autoincrement: bool) -> None:
+    with op.batch_alter_table(
+        "bookings",
+        recreate="always",
+        table_kwargs={"sqlite_autoincrement": autoincrement},
+    ):
+        pass
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != "sqlite":
+        return
+    _rebuild_bookings(autoincrement=True)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'bookings'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'bookings', max(coalesce(("
+        "SELECT max(id) FROM bookings), 0), coalesce(("
+        "SELECT max(id) FROM bookings_history), 0))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != "sqlite":
+        return
+    _rebuild_bookings(autoincrement=False)
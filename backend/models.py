@@ -1,6 +1,6 @@
 from __future__ import annotations
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -31,11 +31,18 @@ class User(Base):
         return "/static/profile_pics/default.jpg"
 
 
+# Usernames and emails are unique and looked up case-insensitively
+Index("ix_users_username_lower", func.lower(User.username), unique=True)
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+
+
 class Car(Base):
     __tablename__ = "cars"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    owner_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
     brand: Mapped[str] = mapped_column(String(50), nullable=False)
     model: Mapped[str] = mapped_column(String(50), nullable=False)
     year: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -58,17 +65,90 @@ class Car(Base):
 class Booking(Base):
     __tablename__ = "bookings"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id"), nullable=False, index=True
-    )
-    car_id: Mapped[int] = mapped_column(
-        ForeignKey("cars.id"), nullable=False, index=True
+    # Composite indexes below cover user_id and car_id lookups as well
+    __table_args__ = (
+        Index(
+            "ix_bookings_car_id_start_date_end_date", "car_id", "start_date", "end_date"
+        ),
+        Index("ix_bookings_user_id_start_date", "user_id", "start_date"),
+        # Archived rows keep their id in bookings_history, so ids of deleted
+        # rows must never be handed out again
+        {"sqlite_autoincrement": True},
     )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    car_id: Mapped[int] = mapped_column(ForeignKey("cars.id"), nullable=False)
     start_date: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False
     )
     end_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # active, completed or cancelled; only active bookings block the car
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="active")
 
     user: Mapped[User] = relationship(back_populates="bookings")
     car: Mapped[Car] = relationship(back_populates="bookings")
+
+
+class BookingHistory(Base):
+    """Bookings moved out of ``bookings`` by ``archive.archive_bookings``.
+
+    Ids are kept from the original rows. There are no foreign keys so the
+    history outlives deleted users and cars.
+    """
+
+    __tablename__ = "bookings_history"
+
+    __table_args__ = (
+        Index("ix_bookings_history_start_date", "start_date"),
+        Index("ix_bookings_history_user_id_start_date", "user_id", "start_date"),
+        Index("ix_bookings_history_car_id_start_date", "car_id", "start_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    car_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_date: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    end_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+class Job(Base):
+    """Outbox row for work deferred until after the request's transaction."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default="pending", index=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # When a worker last claimed the job; running jobs past the lease are stale
+    claimed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, default=None
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True, default=None)
+
+
+class Invalidation(Base):
+    """Cache invalidation message shared between worker processes."""
+
+    __tablename__ = "invalidations"
+    # Workers track the last id they've seen, so ids must never be reused
+    # once pruning has emptied the table
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    channel: Mapped[str] = mapped_column(String(50), nullable=False)
+    key: Mapped[str] = mapped_column(String(200), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
@@ -0,0 +1,90 @@
+import base64
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import Cache
+import models
+from schemas import CarCalendar
+
+# car id -> active bookings as (first day, last day) pairs, inclusive, sorted
+occupancy_cache = Cache("occupancy", ttl=600, maxsize=10_000)
+
+
+def month_range(start: date, months: int) -> tuple[date, int]:
+    """First day of ``start``'s month and the number of days in ``months``."""
+    first = start.replace(day=1)
+    year, month = divmod(first.month - 1 + months, 12)
+    end = first.replace(year=first.year + year, month=month + 1)
+    return first, (end - first).days
+
+
+async def load_occupancy(
+    db: AsyncSession, car_ids: list[int]
+) -> dict[int, list[tuple[date, date]]]:
+    """Booked day ranges per car, from the cache or one query for the misses."""
+
+    async def load(keys: list[str]) -> dict[str, list[tuple[date, date]]]:
+        loaded = {key: [] for key in keys}
+        result = await db.execute(
+            select(
+                models.Booking.car_id,
+                models.Booking.start_date,
+                models.Booking.end_date,
+            )
+            .where(models.Booking.car_id.in_([int(key) for key in keys]))
+            .where(models.Booking.status == "active")
+            .order_by(models.Booking.car_id, models.Booking.start_date)
+        )
+        for car_id, start_date, end_date in result.all():
+            loaded[str(car_id)].append((start_date.date(), end_date.date()))
+        return loaded
+
+    occupancy = await occupancy_cache.get_many_or_load(
+        [str(car_id) for car_id in car_ids], load
+    )
+    return {car_id: occupancy[str(car_id)] for car_id in car_ids}
+
+
+def booked_runs(
+    intervals: list[tuple[date, date]], first: date, days: int
+) -> list[tuple[int, int]]:
+    """Merge intervals into ``(offset, length)`` runs of booked days."""
+    runs: list[tuple[int, int]] = []
+    for start, end in intervals:
+        offset = max((start - first).days, 0)
+        stop = min((end - first).days + 1, days)
+        if stop <= offset:
+            continue
+        if runs and offset <= runs[-1][0] + runs[-1][1]:
+            run_offset, run_length = runs[-1]
+            runs[-1] = (run_offset, max(run_length, stop - run_offset))
+        else:
+            runs.append((offset, stop - offset))
+    return runs
+
+
+def runs_to_bitmap(runs: list[tuple[int, int]], days: int) -> str:
+    """One bit per day, least significant bit first, base64 encoded."""
+    bits = bytearray((days + 7) // 8)
+    for offset, length in runs:
+        for day in range(offset, offset + length):
+            bits[day // 8] |= 1 << (day % 8)
+    return base64.b64encode(bits).decode()
+
+
+def build_calendar(
+    car_id: int,
+    intervals: list[tuple[date, date]],
+    first: date,
+    days: int,
+    encoding: str,
+) -> CarCalendar:
+    runs = booked_runs(intervals, first, days)
+    calendar = CarCalendar(car_id=car_id, start=first, days=days, encoding=encoding)
+    if encoding == "bitmap":
+        calendar.bitmap = runs_to_bitmap(runs, days)
+    else:
+        calendar.runs = runs
+    return calendar
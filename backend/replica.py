@@ -0,0 +1,103 @@
+"""Routes read-only endpoints to the replica, with read-your-writes.
+
+A replica lags the primary, so a user who just booked a car could list
+their bookings and not see it. Every successful mutating request gets a
+signed ``X-Last-Write`` marker in its response, valid for
+``read_your_writes_window``; reads that send it back go to the primary.
+The marker travels with the client, so whichever worker serves the next
+read can check it without hearing from the one that served the write.
+"""
+
+from datetime import UTC, datetime, timedelta
+from typing import Annotated
+
+import jwt
+from fastapi import Depends, Request
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from auth import verify_access_token
+from config import settings
+from database import DB, ReplicaSessionLocal, engine, replica_engine
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+WRITE_MARKER_HEADER = "X-Last-Write"
+
+
+def has_replica() -> bool:
+    return replica_engine is not engine
+
+
+def user_id_from_headers(headers: Headers) -> str | None:
+    scheme, token = get_authorization_scheme_param(headers.get("authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return verify_access_token(token)
+
+
+def create_write_marker(user_id: str) -> str:
+    """Signed proof that ``user_id`` just wrote, expiring after the window."""
+    expire = datetime.now(UTC) + timedelta(seconds=settings.read_your_writes_window)
+    return jwt.encode(
+        # No "sub", so it can't pass for an access token
+        {"writer": user_id, "exp": expire},
+        settings.secret_key.get_secret_value(),
+        algorithm=settings.algorithm,
+    )
+
+
+def wrote_recently(headers: Headers) -> bool:
+    """Whether the request carries an unexpired write marker."""
+    marker = headers.get(WRITE_MARKER_HEADER)
+    if not marker:
+        return False
+    try:
+        jwt.decode(
+            marker,
+            settings.secret_key.get_secret_value(),
+            algorithms=[settings.algorithm],
+            options={"require": ["exp", "writer"]},
+        )
+    except jwt.InvalidTokenError:
+        return False
+    return True
+
+
+async def get_read_db(request: Request, db: DB):
+    # Reads that go to the primary share the request's session (the one
+    # CurrentUser uses) rather than taking a second pooled connection
+    if not has_replica() or wrote_recently(request.headers):
+        yield db
+        return
+    async with ReplicaSessionLocal() as session:
+        yield session
+
+
+ReadDB = Annotated[AsyncSession, Depends(get_read_db)]
+
+
+class ReadYourWritesMiddleware:
+    """Adds a write marker to every successful authenticated mutating request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = user_id_from_headers(Headers(scope=scope))
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marked(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers[WRITE_MARKER_HEADER] = create_write_marker(user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_marked)
@@ -1,21 +1,25 @@
 from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import selectinload
 
 from auth import CurrentUser
 import models
 from database import DB
+from occupancy import occupancy_cache
+from replica import ReadDB
 from schemas import BookingCreate, BookingResponse
+from unit_of_work import group_commit
 
 router = APIRouter()
 
 
 @router.get("/my", response_model=list[BookingResponse])
-async def get_my_bookings(current_user: CurrentUser, db: DB):
+async def get_my_bookings(current_user: CurrentUser, db: ReadDB):
     result = await db.execute(
         select(models.Booking)
         .options(selectinload(models.Booking.car))
         .where(models.Booking.user_id == current_user.id)
+        .where(models.Booking.status == "active")
         .order_by(models.Booking.start_date.desc())
     )
     bookings = result.scalars().all()
@@ -24,47 +28,47 @@ async def get_my_bookings(current_user: CurrentUser, db: DB):
 
 @router.post("", response_model=BookingCreate, status_code=status.HTTP_201_CREATED)
 async def create_booking(booking: BookingCreate, current_user: CurrentUser, db: DB):
-    result = await db.execute(
-        select(models.Car)
-        .options(selectinload(models.Car.owner))
-        .where(models.Car.id == booking.car_id)
-    )
-    car = result.scalars().first()
-    if not car:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Car not found"
+    async def insert_booking(db):
+        result = await db.execute(
+            select(models.Car.id).where(models.Car.id == booking.car_id)
         )
-    # check if any existing bookings for the car overlap with the requested dates
-    result = await db.execute(
-        select(models.Booking)
-        .where(models.Booking.car_id == booking.car_id)
-        .where(
-            (models.Booking.start_date <= booking.end_date)
-            & (models.Booking.end_date >= booking.start_date)
+        if not result.first():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Car not found"
+            )
+
+        # check if any existing bookings for the car overlap with the requested dates
+        result = await db.execute(
+            select(models.Booking.id)
+            .where(models.Booking.car_id == booking.car_id)
+            .where(models.Booking.status == "active")
+            .where(
+                (models.Booking.start_date <= booking.end_date)
+                & (models.Booking.end_date >= booking.start_date)
+            )
+            .limit(1)
         )
-    )
-    overlapping_booking = result.scalars().first()
-    if overlapping_booking:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Car is already booked for the selected dates",
+        if result.first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Car is already booked for the selected dates",
+            )
+
+        # Removed: car.status = "booked" - availablity is now determining by overlap check only
+        new_booking = await db.scalar(
+            insert(models.Booking)
+            .values(
+                user_id=current_user.id,
+                car_id=booking.car_id,
+                start_date=booking.start_date,
+                end_date=booking.end_date,
+            )
+            .returning(models.Booking)
         )
+        occupancy_cache.invalidate_on_commit(db, str(booking.car_id))
+        return new_booking
 
-    new_booking = models.Booking(
-        user_id=current_user.id,
-        car_id=booking.car_id,
-        start_date=booking.start_date,
-        end_date=booking.end_date,
-    )
-
-    db.add(new_booking)
-    await db.commit()
-    await db.refresh(new_booking)
-
-    # Removed: car.status = "booked" - availablity is now determining by overlap check only
-    await db.commit()
-
-    return new_booking
+    return await group_commit.run(insert_booking)
 
 
 @router.delete("/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -86,10 +90,17 @@ async def cancel_booking(booking_id: int, current_user: CurrentUser, db: DB):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You cannot cancel this booking",
         )
+    if booking.status != "active":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Booking is already {booking.status}",
+        )
 
     # Removed: if booking.car: booking.car.status = "available"
 
-    await db.delete(booking)
+    # Kept for history; archive.archive_bookings moves it out of the hot table
+    booking.status = "cancelled"
+    occupancy_cache.invalidate_on_commit(db, str(booking.car_id))
     await db.commit()
 
 
@@ -111,8 +122,15 @@ async def complete_booking(booking_id: int, current_user: CurrentUser, db: DB):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You cannot complete this booking",
         )
+    if booking.status != "active":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Booking is already {booking.status}",
+        )
 
     # Removed: if booking.car: booking.car.status = "available"
 
-    await db.delete(booking)
+    # Kept for history; archive.archive_bookings moves it out of the hot table
+    booking.status = "completed"
+    occupancy_cache.invalidate_on_commit(db, str(booking.car_id))
     await db.commit()
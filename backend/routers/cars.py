@@ -1,18 +1,63 @@
-from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
+import asyncio
+from datetime import date
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, HTTPException, Query, status
+from sqlalchemy import insert, select
 from sqlalchemy.orm import selectinload
 
+import archive
 from auth import CurrentUser
+from cache import Cache
+from config import settings
 import models
-from database import DB
-from schemas import CarCreate, CarResponse, CarResponseWithBookings, CarUpdate
+from database import DB, AsyncSessionLocal
+from jobs import job_queue
+import media
+from occupancy import build_calendar, load_occupancy, month_range, occupancy_cache
+from replica import ReadDB, has_replica
+from schemas import (
+    CarCalendar,
+    CarCreate,
+    CarResponse,
+    CarResponseWithBookings,
+    CarUpdate,
+)
+from unit_of_work import group_commit
 
 router = APIRouter()
 
+car_list_cache = Cache("cars", ttl=300)
+
+
+@job_queue.handler("delete_car_image", concurrency=4)
+async def delete_car_image(image_file: str):
+    # Images are named by content, so another car may share the file
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.Car.id).where(models.Car.image_file == image_file).limit(1)
+        )
+        if result.first():
+            return
+    path = media.MEDIA_ROOT / "car_images" / image_file
+    if not await asyncio.to_thread(media.discard, path):
+        # An upload of the same content just rewrote it and may not have
+        # committed its car yet; look again once it must have
+        async with AsyncSessionLocal() as db:
+            job_queue.enqueue(
+                db,
+                "delete_car_image",
+                delay=media.UPLOAD_COMMIT_GRACE,
+                image_file=image_file,
+            )
+            await db.commit()
+
+
+@job_queue.handler("precompress_media", concurrency=2)
+async def precompress_media(path: str):
+    await asyncio.to_thread(media.precompress, media.MEDIA_ROOT / path)
+
 
-import shutil
-import os
-from uuid import uuid4
 from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
 
 @router.post("", response_model=CarResponse, status_code=status.HTTP_201_CREATED)
@@ -27,39 +72,46 @@ async def create_car(
     current_user: CurrentUser = None, # Depends is injected in main, but here we use the type alias logic which works if auth.py is correct
     db: DB = None,
 ):
-    # Ensure directory exists
-    os.makedirs("media/car_images", exist_ok=True)
-
-    # Generate unique filename
-    file_extension = os.path.splitext(image.filename)[1]
-    unique_filename = f"{uuid4()}{file_extension}"
-    file_path = f"media/car_images/{unique_filename}"
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-
-    new_car = models.Car(
-        owner_id=current_user.id,
-        brand=brand,
-        model=model,
-        year=year,
-        price_per_day=price_per_day,
-        location=location,
-        contact_number=contact_number,
-        image_file=unique_filename,
-    )
+    image_file = await media.save_upload(image, "car_images")
+
+    async def insert_car(db):
+        # Photos are usually JPEG/PNG, which precompressing would skip anyway
+        if media.compressible(image_file):
+            job_queue.enqueue(
+                db, "precompress_media", path=f"car_images/{image_file}"
+            )
+        car_list_cache.invalidate_on_commit(db)
+        return await db.scalar(
+            insert(models.Car)
+            .values(
+                owner_id=current_user.id,
+                brand=brand,
+                model=model,
+                year=year,
+                price_per_day=price_per_day,
+                location=location,
+                contact_number=contact_number,
+                image_file=image_file,
+            )
+            .returning(models.Car)
+        )
 
-    db.add(new_car)
-    await db.commit()
-    await db.refresh(new_car)
-    return new_car
+    return await group_commit.run(insert_car)
 
 
 @router.get("", response_model=list[CarResponse])
-async def list_cars(db: DB):
-    result = await db.execute(select(models.Car))
-    cars = result.scalars().all()
-    return cars
+async def list_cars(db: ReadDB, primary: DB):
+    async def load():
+        # The cache is shared by everyone, so don't fill it from a replica
+        # that may not have caught up with the write that invalidated it
+        window = settings.read_your_writes_window
+        if has_replica() and car_list_cache.invalidated_within(window):
+            result = await primary.execute(select(models.Car))
+        else:
+            result = await db.execute(select(models.Car))
+        return [CarResponse.model_validate(car) for car in result.scalars().all()]
+
+    return await car_list_cache.get_or_load("all", load)
 
 
 @router.get("/my", response_model=list[CarResponse])
@@ -71,11 +123,60 @@ async def get_my_cars(current_user: CurrentUser, db: DB):
     return cars
 
 
+CalendarStart = Annotated[
+    date | None, Query(description="Any day in the first month; defaults to today")
+]
+CalendarMonths = Annotated[int, Query(ge=1, le=12)]
+CalendarEncoding = Annotated[Literal["rle", "bitmap"], Query()]
+
+
+@router.get(
+    "/calendar", response_model=list[CarCalendar], response_model_exclude_none=True
+)
+async def get_cars_calendar(
+    car_ids: Annotated[list[int], Query(min_length=1, max_length=100)],
+    db: DB,
+    start: CalendarStart = None,
+    months: CalendarMonths = 1,
+    encoding: CalendarEncoding = "rle",
+):
+    """Occupancy of several cars at once, e.g. for the listing grid."""
+    first, days = month_range(start or date.today(), months)
+    occupancy = await load_occupancy(db, car_ids)
+    return [
+        build_calendar(car_id, occupancy[car_id], first, days, encoding)
+        for car_id in car_ids
+    ]
+
+
+@router.get(
+    "/{car_id}/calendar", response_model=CarCalendar, response_model_exclude_none=True
+)
+async def get_car_calendar(
+    car_id: int,
+    db: DB,
+    start: CalendarStart = None,
+    months: CalendarMonths = 1,
+    encoding: CalendarEncoding = "rle",
+):
+    result = await db.execute(select(models.Car.id).where(models.Car.id == car_id))
+    if not result.first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Car not found"
+        )
+
+    first, days = month_range(start or date.today(), months)
+    occupancy = await load_occupancy(db, [car_id])
+    return build_calendar(car_id, occupancy[car_id], first, days, encoding)
+
+
 @router.get("/{car_id}", response_model=CarResponseWithBookings)
-async def get_car(car_id: int, db: DB):
+async def get_car(car_id: int, db: ReadDB):
     result = await db.execute(
         select(models.Car)
-        .options(selectinload(models.Car.bookings))
+        .options(
+            selectinload(models.Car.bookings.and_(models.Booking.status == "active"))
+        )
         .where(models.Car.id == car_id)
     )
     car = result.scalars().first()
@@ -103,8 +204,8 @@ async def update_car(car_id: int, car: CarUpdate, current_user: CurrentUser, db:
     for field, value in car.model_dump(exclude_unset=True).items():
         setattr(existing_car, field, value)
 
+    car_list_cache.invalidate_on_commit(db)
     await db.commit()
-    await db.refresh(existing_car)
     return existing_car
 
 
@@ -122,5 +223,10 @@ async def delete_car(car_id: int, current_user: CurrentUser, db: DB):
             status_code=status.HTTP_403_FORBIDDEN, detail="You cannot delete this car"
         )
 
+    job_queue.enqueue(db, "delete_car_image", image_file=car.image_file)
+    # Keep the car's bookings as history rather than cascading the delete
+    await archive.move_to_history(db, models.Booking.car_id == car_id)
     await db.delete(car)
+    car_list_cache.invalidate_on_commit(db)
+    occupancy_cache.invalidate_on_commit(db, str(car_id))
     await db.commit()
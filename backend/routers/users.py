@@ -1,53 +1,105 @@
 from datetime import timedelta
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import archive
 from config import settings
 import models
-from database import get_db
+from database import get_db, index_names
+from replica import ReadDB
 from schemas import UserCreate, UserPublic, UserUpdate, UserPrivate, Token
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import func
 from auth import create_access_token, hash_password, verify_password, CurrentUser
+from occupancy import occupancy_cache
+from routers.cars import car_list_cache
 
 router = APIRouter()
 
+# Created by migration 0002; create_all doesn't add them to existing tables
+IDENTITY_INDEXES = {"ix_users_username_lower", "ix_users_email_lower"}
+_identities_indexed = False
+
+
+async def identities_indexed(db: AsyncSession) -> bool:
+    """Whether the unique lower() indexes enforce case-insensitive identities.
+
+    Until they exist (e.g. a database created before migrations and not
+    upgraded yet), nothing stops "alice" being added next to "Alice", so
+    writes have to be pre-checked with ``find_taken_field``.
+    """
+    global _identities_indexed
+    if not _identities_indexed:
+        present = await index_names(await db.connection())
+        _identities_indexed = IDENTITY_INDEXES <= present
+    return _identities_indexed
+
+
+async def find_taken_field(
+    db: AsyncSession,
+    username: str | None,
+    email: str | None,
+    exclude_user_id: int | None = None,
+) -> str | None:
+    """Return "username" or "email" if another user already has that value.
+
+    Used after a unique index rejects a write, so a single indexed lookup
+    explains the failure instead of pre-checking every write, and as that
+    pre-check while the indexes are missing.
+    """
+    conditions = []
+    if username is not None:
+        conditions.append(func.lower(models.User.username) == username.lower())
+    if email is not None:
+        conditions.append(func.lower(models.User.email) == email.lower())
+    if not conditions:
+        return None
+    query = select(models.User.username, models.User.email).where(or_(*conditions))
+    if exclude_user_id is not None:
+        query = query.where(models.User.id != exclude_user_id)
+
+    result = await db.execute(query)
+    for existing_username, existing_email in result.all():
+        if username is not None and existing_username.lower() == username.lower():
+            return "username"
+        if email is not None and existing_email.lower() == email.lower():
+            return "email"
+    return None
+
 
 @router.post("", response_model=UserPrivate, status_code=status.HTTP_201_CREATED)
 async def create_user(user: UserCreate, db: Annotated[AsyncSession, Depends(get_db)]):
-    result = await db.execute(
-        select(models.User).where(
-            func.lower(models.User.username) == user.username.lower()
-        ),
-    )
-    existing_user = result.scalars().first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Username already exists"
+    taken = None
+    if not await identities_indexed(db):
+        taken = await find_taken_field(db, user.username, user.email)
+
+    if taken is None:
+        new_user = models.User(
+            username=user.username,
+            email=user.email.lower(),
+            password_hash=hash_password(user.password),
         )
-
-    result = await db.execute(
-        select(models.User).where(func.lower(models.User.email) == user.email.lower()),
-    )
-    existing_email = result.scalars().first()
-    if existing_email:
+        db.add(new_user)
+        try:
+            await db.commit()
+            return new_user
+        except IntegrityError:
+            await db.rollback()
+            taken = await find_taken_field(db, user.username, user.email)
+            if taken is None:
+                raise
+
+    if taken == "username":
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Email already exists"
+            status_code=status.HTTP_404_NOT_FOUND, detail="Username already exists"
         )
-
-    new_user = models.User(
-        username=user.username,
-        email=user.email.lower(),
-        password_hash=hash_password(user.password),
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="Email already exists"
     )
 
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
-    return new_user
-
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
@@ -82,7 +134,7 @@ async def get_current_user(current_user: CurrentUser):
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-async def get_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_user(user_id: int, db: ReadDB):
     result = await db.execute(select(models.User).where(models.User.id == user_id))
     user = result.scalars().first()
     if user:
@@ -130,46 +182,38 @@ async def update_user(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    if (
-        user_update.username is not None
-        and user_update.username.lower() != user.username.lower()
-    ):
-        result = await db.execute(
-            select(models.User).where(
-                func.lower(models.User.username) == user_update.username.lower()
-            )
+    taken = None
+    if not await identities_indexed(db):
+        taken = await find_taken_field(
+            db, user_update.username, user_update.email, exclude_user_id=user_id
         )
-        existing_user = result.scalars().first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists"
-            )
 
-    if (
-        user_update.email is not None
-        and user_update.email.lower() != user.email.lower()
-    ):
-        result = await db.execute(
-            select(models.User).where(
-                func.lower(models.User.email) == user_update.email.lower()
+    if taken is None:
+        update_data = user_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            if field == "email":
+                value = value.lower()
+            setattr(user, field, value)
+
+        try:
+            await db.commit()
+            return user
+        except IntegrityError:
+            await db.rollback()
+            taken = await find_taken_field(
+                db, user_update.username, user_update.email, exclude_user_id=user_id
             )
-        )
-        existing_email = result.scalars().first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered",
-            )
-
-    update_data = user_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        if field == "email":
-            value = value.lower()
-        setattr(user, field, value)
+            if taken is None:
+                raise
 
-    await db.commit()
-    await db.refresh(user)
-    return user
+    if taken == "username":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered",
+    )
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -191,5 +235,17 @@ async def delete_user(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
+    # Keep their bookings, and those on their cars, as history rather than
+    # cascading the delete
+    await archive.move_to_history(
+        db,
+        (models.Booking.user_id == user_id)
+        | models.Booking.car_id.in_(
+            select(models.Car.id).where(models.Car.owner_id == user_id)
+        ),
+    )
     await db.delete(user)
+    # Their cars are deleted along with them
+    car_list_cache.invalidate_on_commit(db)
+    occupancy_cache.invalidate_on_commit(db)
     await db.commit()
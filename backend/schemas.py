@@ -1,6 +1,18 @@
 from __future__ import annotations
-from datetime import datetime
-from pydantic import BaseModel, ConfigDict, Field, EmailStr
+from datetime import date, datetime
+from typing import Annotated, Literal
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, EmailStr
+
+
+def _not_after_next_year(year: int) -> int:
+    # Checked per request so the bound doesn't go stale in a long-running process
+    max_year = datetime.now().year + 1
+    if year > max_year:
+        raise ValueError(f"Input should be less than or equal to {max_year}")
+    return year
+
+
+CarYear = Annotated[int, Field(ge=2000), AfterValidator(_not_after_next_year)]
 
 
 class UserBase(BaseModel):
@@ -39,7 +51,7 @@ class Token(BaseModel):
 class CarBase(BaseModel):
     brand: str = Field(min_length=1, max_length=50)
     model: str = Field(min_length=1, max_length=50)
-    year: int = Field(ge=2000, le=datetime.now().year + 1)
+    year: CarYear
     price_per_day: float = Field(gt=0)
     location: str = Field(min_length=1, max_length=100)
     contact_number: str = Field(min_length=1, max_length=20)
@@ -53,7 +65,7 @@ class CarCreate(CarBase):
 class CarUpdate(BaseModel):
     brand: str | None = Field(min_length=1, max_length=50, default=None)
     model: str | None = Field(min_length=1, max_length=50, default=None)
-    year: int | None = Field(ge=2000, le=datetime.now().year + 1, default=None)
+    year: CarYear | None = None
     price_per_day: float | None = Field(gt=0, default=None)
     location: str | None = Field(min_length=1, max_length=100, default=None)
     contact_number: str | None = Field(min_length=1, max_length=20, default=None)
@@ -89,4 +101,20 @@ class BookingResponse(BookingBase):
 
     id: int
     user_id: int
+    status: Literal["active", "completed", "cancelled"]
     car: CarResponse
+
+
+class CarCalendar(BaseModel):
+    """Booked days of a car from ``start`` for ``days`` days.
+
+    ``runs`` holds ``[offset, length]`` pairs of booked days; ``bitmap`` is
+    one bit per day (least significant bit first), base64 encoded.
+    """
+
+    car_id: int
+    start: date
+    days: int
+    encoding: Literal["rle", "bitmap"]
+    runs: list[tuple[int, int]] | None = None
+    bitmap: str | None = None
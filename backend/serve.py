@@ -0,0 +1,146 @@
+"""Run the API with several worker processes.
+
+    uv run serve.py --workers 4
+    uv run serve.py --profile-startup
+
+Each worker keeps its own caches; they stay coherent through the
+invalidation bus (see ``bus.py``), so use the ``sqlite`` bus whenever more
+than one worker is running.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.util import find_spec
+
+import uvicorn
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def import_breakdown(limit: int = 8) -> list[tuple[float, str]]:
+    """Cumulative import time in ms of the modules ``main`` imports directly."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+    )
+    modules: list[tuple[float, str]] = []
+    children: list[tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        try:
+            _, cumulative, name = line.split("|")
+            cumulative_ms = int(cumulative) / 1000
+        except ValueError:
+            continue
+        # importtime indents by nesting depth and lists children before parents
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((cumulative_ms, name.strip()))
+        elif depth == 0:
+            if name.strip() == "main":
+                modules = children
+            children = []
+    return sorted(modules, reverse=True)[:limit]
+
+
+def profile_startup(budget_ms: float) -> bool:
+    """Time a cold import of the app and its lifespan; True if within budget.
+
+    Both run in a scratch directory, where the app's relative database and
+    media paths point at throwaway copies, so the lifespan's job queue and
+    bus can't claim jobs or publish invalidations on the real database.
+    """
+    workdir = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="profile-startup-")
+    started = time.perf_counter()
+    # Settings read .env from the working directory
+    importlib.import_module("config")
+    os.chdir(scratch)
+    os.mkdir("media")
+    try:
+        main = importlib.import_module("main")
+        imported = time.perf_counter()
+
+        async def run_lifespan() -> tuple[float, float]:
+            async with main.app.router.lifespan_context(main.app):
+                ready = time.perf_counter()
+            return ready, time.perf_counter()
+
+        ready, stopped = asyncio.run(run_lifespan())
+    finally:
+        os.chdir(workdir)
+        shutil.rmtree(scratch)
+    total_ms = (ready - started) * 1000
+
+    print(f"{'import main':<24}{(imported - started) * 1000:>9.1f} ms")
+    for cumulative_ms, name in import_breakdown():
+        print(f"  {name:<22}{cumulative_ms:>9.1f} ms")
+    print(f"{'lifespan startup':<24}{(ready - imported) * 1000:>9.1f} ms")
+    print(f"{'lifespan shutdown':<24}{(stopped - ready) * 1000:>9.1f} ms")
+    within_budget = total_ms <= budget_ms
+    verdict = "ok" if within_budget else "OVER BUDGET"
+    print(
+        f"{'time to ready':<24}{total_ms:>9.1f} ms  ({verdict}, budget {budget_ms:g} ms)"
+    )
+    return within_budget
+
+
+async def build_schema() -> None:
+    from database import create_schema, engine
+
+    await create_schema()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the car rental API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report cold-start timings instead of serving",
+    )
+    parser.add_argument("--startup-budget", type=float, default=1000.0, metavar="MS")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        sys.exit(0 if profile_startup(args.startup_budget) else 1)
+
+    from config import settings
+
+    if args.workers > 1 and settings.invalidation_bus == "local":
+        parser.error("the local invalidation bus cannot be shared between workers")
+
+    if settings.environment == "development":
+        # Each worker's lifespan runs create_all too; on a fresh database
+        # they would race to create the same tables
+        asyncio.run(build_schema())
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+        backlog=args.backlog,
+        access_log=args.access_log,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
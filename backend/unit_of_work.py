@@ -0,0 +1,93 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import settings
+from database import CommitSessionLocal
+
+T = TypeVar("T")
+
+Write = Callable[[AsyncSession], Awaitable[T]]
+
+
+class GroupCommit:
+    """Commits small writes from concurrent requests in one transaction.
+
+    ``run(write)`` queues ``write`` and waits for the commit that includes it.
+    When nothing is being committed the queue is flushed straight away, so an
+    idle server adds no latency; writes that arrive while a commit is in
+    flight go into the next one, up to ``max_batch`` at a time. Each write
+    runs in its own savepoint, so one that raises (e.g. an overlap check
+    failing) is rolled back and re-raised to its caller only.
+
+    Writes must do their own reads inside ``write``: the batch holds the
+    write lock from its first statement, which is what keeps e.g. two
+    overlapping bookings from both passing their check.
+
+    Batches use ``session_factory``'s own pool (see ``commit_engine``), so
+    callers may keep their request session open while they wait.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = CommitSessionLocal,
+        max_batch: int = 64,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._pending: list[tuple[Write, asyncio.Future]] = []
+        self._flusher: asyncio.Task | None = None
+
+    async def run(self, write: Write[T]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((write, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        # Let writes that are already runnable join the first batch
+        await asyncio.sleep(0)
+        while self._pending:
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            await self._commit(batch)
+
+    async def _commit(self, batch: list[tuple[Write, asyncio.Future]]) -> None:
+        results = []
+        try:
+            async with self.session_factory() as db:
+                connection = await db.connection()
+                if connection.dialect.name == "sqlite":
+                    # pysqlite only begins a transaction on the first DML, so
+                    # the first SAVEPOINT would otherwise commit on release
+                    await connection.exec_driver_sql("BEGIN IMMEDIATE")
+                if len(batch) == 1:
+                    # Nothing to isolate from; a failure rolls back the lot
+                    results.append((batch[0][1], await batch[0][0](db)))
+                else:
+                    for write, future in batch:
+                        if future.done():  # caller went away
+                            continue
+                        try:
+                            async with db.begin_nested():
+                                result = await write(db)
+                        except Exception as exc:
+                            future.set_exception(exc)
+                        else:
+                            results.append((future, result))
+                await db.commit()
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result in results:
+            if not future.done():
+                future.set_result(result)
+
+
+group_commit = GroupCommit(max_batch=settings.group_commit_max_batch)
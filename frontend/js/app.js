@@ -4,6 +4,20 @@ const API_URL = BACKEND_URL + "/api";
 // Auth State
 let currentUser = null;
 let token = localStorage.getItem("token");
+// Signed marker the API returns after a write; reads that send it back are
+// served from the primary database instead of a possibly lagging replica
+let lastWrite = sessionStorage.getItem("lastWrite");
+
+const rememberWrite = (response) => {
+  const marker = response.headers.get("X-Last-Write");
+  if (marker) {
+    lastWrite = marker;
+    sessionStorage.setItem("lastWrite", marker);
+  }
+};
+
+const readHeaders = (headers = {}) =>
+  lastWrite ? { ...headers, "X-Last-Write": lastWrite } : headers;
 
 // Utility Functions
 const formatCurrency = (amount) => {
@@ -154,7 +168,9 @@ const api = {
 
   async getCars() {
     try {
-      const response = await fetch(`${API_URL}/cars`);
+      const response = await fetch(`${API_URL}/cars`, {
+        headers: readHeaders(),
+      });
       return await response.json();
     } catch (error) {
       console.error("Error fetching cars:", error);
@@ -164,7 +180,9 @@ const api = {
 
   async getCar(id) {
     try {
-      const response = await fetch(`${API_URL}/cars/${id}`);
+      const response = await fetch(`${API_URL}/cars/${id}`, {
+        headers: readHeaders(),
+      });
       if (!response.ok) throw new Error("Car not found");
       return await response.json();
     } catch (error) {
@@ -177,7 +195,7 @@ const api = {
     if (!token) return [];
     try {
       const response = await fetch(`${API_URL}/bookings/my`, {
-        headers: { Authorization: `Bearer ${token}` },
+        headers: readHeaders({ Authorization: `Bearer ${token}` }),
       });
       if (!response.ok) throw new Error("Failed to fetch bookings");
       return await response.json();
@@ -203,6 +221,7 @@ const api = {
         }),
       });
 
+      rememberWrite(response);
       if (!response.ok) {
         const error = await response.json();
         throw new Error(error.detail || "Booking failed");
@@ -224,6 +243,7 @@ const api = {
         body: formData,
       });
 
+      rememberWrite(response);
       if (!response.ok) {
         const error = await response.json();
         throw new Error(error.detail || "Failed to add car");
@@ -256,6 +276,7 @@ const api = {
         headers: { Authorization: `Bearer ${token}` },
       });
 
+      rememberWrite(response);
       if (!response.ok) {
         const error = await response.json();
         throw new Error(error.detail || "Failed to delete car");
@@ -274,6 +295,7 @@ const api = {
         headers: { Authorization: `Bearer ${token}` },
       });
 
+      rememberWrite(response);
       if (!response.ok) {
         const error = await response.json();
         throw new Error(error.detail || "Failed to cancel booking");